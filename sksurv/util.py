@@ -12,19 +12,34 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import numpy
 import pandas
-from pandas.api.types import is_categorical_dtype
-from sklearn.utils import check_array, check_consistent_length
+from sklearn.utils import assert_all_finite, check_array, check_consistent_length
+from sklearn.utils.validation import _num_samples
 
 __all__ = ['check_array_survival', 'check_y_survival', 'safe_concat', 'Surv']
 
 
+def _is_binary_01(event):
+    """Whether a numeric array consists of exactly the values 0 and 1.
+
+    For integer arrays, checking minimum and maximum suffices,
+    which avoids sorting the array as done by :func:`numpy.unique`.
+    """
+    if event.size == 0 or event.dtype.kind not in 'uif':
+        return False
+    if event.min() != 0 or event.max() != 1:
+        return False
+    if event.dtype.kind in 'ui':
+        return True
+    return bool(numpy.all((event == 0) | (event == 1)))
+
+
 class Surv:
     """
     Helper class to construct structured array of event indicator and observed time.
     """
 
     @staticmethod
-    def from_arrays(event, time, name_event=None, name_time=None):
+    def from_arrays(event, time, name_event=None, name_time=None, validate=True, out=None):
         """Create structured array.
 
         Parameters
@@ -37,6 +52,14 @@ class Surv:
             Name of event, optional, default: 'event'
         name_time : str|None
             Name of observed time, optional, default: 'time'
+        validate : bool
+            Whether to check that `event` and `time` have the same length
+            and that `event` is binary. Only disable checks if inputs are
+            known to be valid, optional, default: True
+        out : np.array|None
+            Structured array to store the result in. It must have the
+            same shape and dtype as the returned array. If None, a new
+            array is allocated, optional, default: None
 
         Returns
         -------
@@ -48,27 +71,35 @@ class Surv:
         if name_time == name_event:
             raise ValueError('name_time must be different from name_event')
 
-        time = numpy.asanyarray(time, dtype=float)
-        y = numpy.empty(time.shape[0],
-                        dtype=[(name_event, bool), (name_time, float)])
-        y[name_time] = time
-
         event = numpy.asanyarray(event)
-        check_consistent_length(time, event)
+        time = numpy.asanyarray(time)
+        if validate:
+            check_consistent_length(time, event)
 
-        if numpy.issubdtype(event.dtype, numpy.bool_):
-            y[name_event] = event
-        else:
+        # validate before writing anything, such that out is left unchanged on error
+        if validate and not (numpy.issubdtype(event.dtype, numpy.bool_) or _is_binary_01(event)):
+            # invalid or non-numeric input, determine which error to report
             events = numpy.unique(event)
-            events.sort()
             if len(events) != 2:
                 raise ValueError('event indicator must be binary')
 
             if numpy.all(events == numpy.array([0, 1], dtype=events.dtype)):
-                y[name_event] = event.astype(bool)
+                event = event.astype(bool)
             else:
                 raise ValueError('non-boolean event indicator must contain 0 and 1 only')
 
+        dtype = numpy.dtype([(name_event, bool), (name_time, float)])
+        if out is None:
+            y = numpy.empty(time.shape[0], dtype=dtype)
+        elif out.shape != (time.shape[0],) or out.dtype != dtype:
+            raise ValueError('out must have shape {} and dtype {}, but got shape {} and dtype {}'.format(
+                (time.shape[0],), dtype, out.shape, out.dtype))
+        else:
+            y = out
+        # cast directly into the structured array to avoid an intermediate copy
+        numpy.copyto(y[name_time], time, casting='unsafe')
+        y[name_event] = event
+
         return y
 
     @staticmethod
@@ -94,12 +125,31 @@ class Surv:
                 "exepected pandas.DataFrame, but got {!r}".format(type(data)))
 
         return Surv.from_arrays(
-            data.loc[:, event].values,
-            data.loc[:, time].values,
+            data[event].to_numpy(),
+            data[time].to_numpy(dtype=float),
             name_event=str(event),
             name_time=str(time))
 
 
+def _check_time(yt, argnum, from_structured):
+    """Check array of time information passed to :func:`check_y_survival`."""
+    if yt is None:
+        return yt
+
+    if from_structured and yt.dtype.kind in 'iuf':
+        # fields of a structured array are one-dimensional already,
+        # only floating point values can be non-finite
+        if yt.dtype.kind == 'f':
+            assert_all_finite(yt)
+        return yt
+
+    yt = check_array(yt, ensure_2d=False)
+    if not numpy.issubdtype(yt.dtype, numpy.number):
+        raise ValueError('time must be numeric, but found {} for argument {}'.format(yt.dtype, argnum))
+
+    return yt
+
+
 def check_y_survival(y_or_event, *args, allow_all_censored=False):
     """Check that array correctly represents an outcome for survival analysis.
 
@@ -110,7 +160,8 @@ def check_y_survival(y_or_event, *args, allow_all_censored=False):
         as first field, time of event or time of censoring as
         second field, and optionally time of entry as third field. Otherwise,
         it is assumed that a boolean array representing the event indicator is
-        passed.
+        passed. Fields of a structured array are copied into contiguous
+        arrays, passing separate arrays avoids this copy.
 
     *args : list of array-likes
         Any number of array-like objects representing time information.
@@ -143,32 +194,47 @@ def check_y_survival(y_or_event, *args, allow_all_censored=False):
                              'event/censoring, and the third optional field '
                              'the time of entry.')
 
-        y_event = y[y.dtype.names[0]]
-        time_args = (y[arg] for arg in y.dtype.names[1:])
+        # fields of a structured array are strided views, copy them into
+        # contiguous arrays once to speed up subsequent operations
+        y_event = numpy.array(y[y.dtype.names[0]], order='C')
+        time_args = [numpy.array(y[arg], order='C') for arg in y.dtype.names[1:]]
+        # fields of a non-empty one-dimensional structured array with a
+        # boolean or numeric dtype do not need to go through check_array
+        from_structured = y.ndim == 1 and y.shape[0] > 0
     else:
         y_event = numpy.asanyarray(y_or_event)
         time_args = args
+        from_structured = False
 
-    event = check_array(y_event, ensure_2d=False)
+    if from_structured and y_event.dtype == numpy.bool_:
+        event = y_event
+    else:
+        event = check_array(y_event, ensure_2d=False)
     if not numpy.issubdtype(event.dtype, numpy.bool_):
         raise ValueError('elements of event indicator must be boolean, but found {0}'.format(event.dtype))
 
     if not (allow_all_censored or numpy.any(event)):
         raise ValueError('all samples are censored')
 
-    return_val = [event]
-    for i, yt in enumerate(time_args):
-        if yt is None:
-            return_val.append(yt)
-            continue
+    if len(time_args) == 1:
+        return event, _check_time(time_args[0], 2, from_structured)
+    if len(time_args) == 2:
+        return event, _check_time(time_args[0], 2, from_structured), _check_time(time_args[1], 3, from_structured)
+    return (event,) + tuple([_check_time(yt, i, from_structured) for i, yt in enumerate(time_args, 2)])
 
-        yt = check_array(yt, ensure_2d=False)
-        if not numpy.issubdtype(yt.dtype, numpy.number):
-            raise ValueError('time must be numeric, but found {} for argument {}'.format(yt.dtype, i + 2))
 
-        return_val.append(yt)
+def _check_n_samples(X, *arrays):
+    """Check that `X` and arrays returned by :func:`check_y_survival` have the same number of samples.
 
-    return tuple(return_val)
+    Unlike :func:`sklearn.utils.check_consistent_length`, the number of
+    samples of the validated arrays is obtained directly from their shape.
+    As there, `X` is ignored if it is None.
+    """
+    lengths = [a.shape[0] for a in arrays]
+    if X is not None:
+        lengths.insert(0, _num_samples(X))
+    if any(n != lengths[0] for n in lengths[1:]):
+        raise ValueError('Found input variables with inconsistent numbers of samples: {!r}'.format(lengths))
 
 
 def check_array_survival(X, y):
@@ -196,10 +262,29 @@ def check_array_survival(X, y):
         Time of event or censoring.
     """
     event, time = check_y_survival(y)
-    check_consistent_length(X, event, time)
+    _check_n_samples(X, event, time)
     return event, time
 
 
+def _unique_event_times(event, time):
+    """Sorted unique times of samples that experienced an event.
+
+    Equivalent to ``numpy.unique(time[event])``, but the gathered times
+    are sorted in-place and duplicates are removed by a single comparison
+    of neighbouring elements.
+    """
+    event_times = time[event].astype(numpy.float64, copy=False)
+    if event_times.shape[0] > 1:
+        # data is often ordered by time already, which makes sorting unnecessary
+        if not numpy.all(event_times[1:] >= event_times[:-1]):
+            event_times.sort()
+        mask = numpy.empty(event_times.shape[0], dtype=bool)
+        mask[0] = True
+        numpy.not_equal(event_times[1:], event_times[:-1], out=mask[1:])
+        event_times = event_times[mask]
+    return event_times
+
+
 def build_survival_tree_array(X, y, with_event=False):
     """Builds the numeric array and event times used in survival trees.
 
@@ -229,17 +314,21 @@ def build_survival_tree_array(X, y, with_event=False):
     """
 
     event, time, *entry = check_y_survival(y)
-    check_consistent_length(X, event, time, *entry)
+    _check_n_samples(X, event, time, *entry)
 
     y_numeric = numpy.empty((X.shape[0], 2 + len(entry)), dtype=numpy.float64)
-    y_numeric[:, 0] = time.astype(numpy.float64)
-    y_numeric[:, 1] = event.astype(numpy.float64)
+    # write into columns directly to avoid temporary arrays
+    numpy.copyto(y_numeric[:, 0], time, casting='unsafe')
+    # booleans are stored as 0/1 bytes, casting them as uint8 is branchless
+    numpy.copyto(y_numeric[:, 1], event.view(numpy.uint8), casting='unsafe')
     if entry:
-        y_numeric[:, 2] = entry[0].astype(numpy.float64)
+        numpy.copyto(y_numeric[:, 2], entry[0], casting='unsafe')
+
+    event_times = _unique_event_times(event, time)
 
     if with_event:
-        return y_numeric, numpy.unique(y_numeric[:, 0][event]), event
-    return y_numeric, numpy.unique(y_numeric[:, 0][event])
+        return y_numeric, event_times, event
+    return y_numeric, event_times
 
 
 def safe_concat(objs, *args, **kwargs):
@@ -291,11 +380,12 @@ def safe_concat(objs, *args, **kwargs):
     categories = {}
     for df in objs:
         if isinstance(df, pandas.Series):
-            if is_categorical_dtype(df.dtype):
+            if isinstance(df.dtype, pandas.CategoricalDtype):
                 categories[df.name] = {"categories": df.cat.categories, "ordered": df.cat.ordered}
         else:
-            dfc = df.select_dtypes(include=["category"])
-            for name, s in dfc.iteritems():
+            cat_cols = [c for c, d in zip(df.columns, df.dtypes) if isinstance(d, pandas.CategoricalDtype)]
+            for name in cat_cols:
+                s = df[name]
                 if name in categories:
                     if axis == 1:
                         raise ValueError("duplicate columns %s" % name)
@@ -303,11 +393,14 @@ def safe_concat(objs, *args, **kwargs):
                         raise ValueError("categories for column %s do not match" % name)
                 else:
                     categories[name] = {"categories": s.cat.categories, "ordered": s.cat.ordered}
-                df[name] = df[name].astype(object)
 
+    # categories have been checked to match, hence pandas.concat retains
+    # categorical columns, unless a column is missing or has a different
+    # dtype in some of the objects, which is handled below
     concatenated = pandas.concat(objs, *args, axis=axis, **kwargs)
 
     for name, params in categories.items():
-        concatenated[name] = pandas.Categorical(concatenated[name], **params)
+        if concatenated[name].dtype != pandas.CategoricalDtype(**params):
+            concatenated[name] = pandas.Categorical(concatenated[name], **params)
 
     return concatenated
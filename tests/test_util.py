@@ -1,4 +1,5 @@
 from collections import OrderedDict
+import re
 
 import numpy
 from numpy.testing import assert_array_equal
@@ -6,7 +7,7 @@ import pandas
 import pandas.testing as tm
 import pytest
 
-from sksurv.util import Surv, safe_concat
+from sksurv.util import Surv, build_survival_tree_array, check_array_survival, check_y_survival, safe_concat
 
 
 class TestUtil:
@@ -64,6 +65,23 @@ class TestUtil:
 
         tm.assert_frame_equal(actual_series, expected_series)
 
+    @staticmethod
+    def test_concat_categorical_does_not_modify_input():
+        rnd = numpy.random.RandomState(14)
+        a = pandas.DataFrame.from_dict(OrderedDict([
+            ("col_A", pandas.Series(pandas.Categorical.from_codes(
+                rnd.binomial(2, 0.6, 100), ["C1", "C2", "C3"]), name="col_A")),
+            ("col_B", rnd.randn(100))]))
+        b = pandas.DataFrame.from_dict(OrderedDict([
+            ("col_B", rnd.randn(100))]))
+        a_copy = a.copy()
+
+        actual_df = safe_concat((a, b), axis=0)
+
+        tm.assert_frame_equal(a, a_copy)
+        assert actual_df.col_A.dtype == a.col_A.dtype
+        assert actual_df.col_A.isnull().sum() == 100
+
     @staticmethod
     def test_concat_categorical_mismatch():
         rnd = numpy.random.RandomState(14)
@@ -222,6 +240,64 @@ class TestSurv:
         y = Surv.from_arrays(event.astype(float), time)
         assert_array_equal(y, expected)
 
+    @staticmethod
+    def test_from_array_uint_event(surv_arrays):
+        event, time = surv_arrays
+
+        expected = numpy.empty(dtype=[('event', bool), ('time', float)], shape=100)
+        expected['event'] = event.astype(bool)
+        expected['time'] = time
+
+        y = Surv.from_arrays(event.astype(numpy.uint8), time)
+        assert_array_equal(y, expected)
+
+    @staticmethod
+    def test_from_array_no_validate(surv_arrays):
+        event, time = surv_arrays
+
+        expected = numpy.empty(dtype=[('event', bool), ('time', float)], shape=100)
+        expected['event'] = event.astype(bool)
+        expected['time'] = time
+
+        y = Surv.from_arrays(event, time, validate=False)
+        assert_array_equal(y, expected)
+
+    @staticmethod
+    def test_from_array_out(surv_arrays):
+        event, time = surv_arrays
+
+        expected = numpy.empty(dtype=[('event', bool), ('time', float)], shape=100)
+        expected['event'] = event.astype(bool)
+        expected['time'] = time
+
+        out = numpy.empty(dtype=[('event', bool), ('time', float)], shape=100)
+        y = Surv.from_arrays(event, time, out=out)
+        assert y is out
+        assert_array_equal(y, expected)
+
+    @staticmethod
+    def test_from_array_out_wrong(surv_arrays):
+        event, time = surv_arrays
+
+        out = numpy.empty(dtype=[('event', bool), ('time', float)], shape=99)
+        with pytest.raises(ValueError, match="out must have shape"):
+            Surv.from_arrays(event, time, out=out)
+
+        out = numpy.empty(dtype=[('death', bool), ('time', float)], shape=100)
+        with pytest.raises(ValueError, match="out must have shape"):
+            Surv.from_arrays(event, time, out=out)
+
+    @staticmethod
+    def test_from_array_out_unchanged_on_error(surv_arrays):
+        event, time = surv_arrays
+        event[1] = 2
+
+        out = numpy.zeros(dtype=[('event', bool), ('time', float)], shape=100)
+        with pytest.raises(ValueError, match="event indicator must be binary"):
+            Surv.from_arrays(event, time, out=out)
+
+        assert_array_equal(out, numpy.zeros(dtype=[('event', bool), ('time', float)], shape=100))
+
     @staticmethod
     def test_from_array_shape_mismatch(surv_arrays):
         event, time = surv_arrays
@@ -278,6 +354,35 @@ class TestSurv:
                            match="event indicator must be binary"):
             Surv.from_arrays(event, time)
 
+    @staticmethod
+    def test_from_array_event_float_not_binary(surv_arrays):
+        event, time = surv_arrays
+        event = event.astype(float)
+        event[1] = 0.5
+
+        with pytest.raises(ValueError,
+                           match="event indicator must be binary"):
+            Surv.from_arrays(event, time)
+
+    @staticmethod
+    def test_from_array_event_int_all_ones(surv_arrays):
+        _, time = surv_arrays
+        event = numpy.ones(time.shape[0], dtype=int)
+
+        with pytest.raises(ValueError,
+                           match="event indicator must be binary"):
+            Surv.from_arrays(event, time)
+
+    @staticmethod
+    def test_from_array_event_float_nan(surv_arrays):
+        event, time = surv_arrays
+        event = event.astype(float)
+        event[1] = numpy.nan
+
+        with pytest.raises(ValueError,
+                           match="event indicator must be binary"):
+            Surv.from_arrays(event, time)
+
     @staticmethod
     def test_from_array_names_match(surv_arrays):
         event, time = surv_arrays
@@ -375,3 +480,125 @@ class TestSurv:
         with pytest.raises(TypeError,
                            match=r"exepected pandas.DataFrame, but got <class 'numpy.ndarray'>"):
             Surv.from_dataframe('event', 'time', data.values)
+
+
+class TestCheckYSurvival:
+
+    @staticmethod
+    def test_structured_contiguous(surv_arrays):
+        event, time = surv_arrays
+        y = Surv.from_arrays(event, time)
+
+        actual_event, actual_time = check_y_survival(y, allow_all_censored=True)
+
+        assert actual_event.flags.c_contiguous
+        assert actual_time.flags.c_contiguous
+        assert not numpy.shares_memory(actual_event, y)
+        assert not numpy.shares_memory(actual_time, y)
+        assert_array_equal(actual_event, y['event'])
+        assert_array_equal(actual_time, y['time'])
+
+    @staticmethod
+    def test_structured_0d():
+        y = Surv.from_arrays([True, False], [1., 2.])
+
+        with pytest.raises(TypeError, match="Input should have at least 1 dimension"):
+            check_y_survival(numpy.asanyarray(y[0]))
+
+    @staticmethod
+    def test_structured_int_time():
+        y = numpy.empty(dtype=[('event', bool), ('time', numpy.int32)], shape=3)
+        y['event'] = [True, False, True]
+        y['time'] = [4, 2, 7]
+
+        event, time = check_y_survival(y)
+
+        assert time.dtype == numpy.int32
+        assert_array_equal(event, [True, False, True])
+        assert_array_equal(time, [4, 2, 7])
+
+    @staticmethod
+    @pytest.mark.parametrize("value", [numpy.nan, numpy.inf, -numpy.inf])
+    def test_structured_non_finite_time(value):
+        y = Surv.from_arrays([True, False, True], [4., 2., 7.])
+        y['time'][1] = value
+
+        with pytest.raises(ValueError, match="Input contains"):
+            check_y_survival(y)
+
+    @staticmethod
+    @pytest.mark.parametrize("dtype,value,match", [
+        (bool, True, "time must be numeric, but found bool for argument 2"),
+        (object, "a", "could not convert string to float: 'a'"),
+        (complex, 1 + 1j, "Complex data not supported"),
+    ])
+    def test_structured_time_wrong_dtype(dtype, value, match):
+        y = numpy.empty(dtype=[('event', bool), ('time', dtype)], shape=3)
+        y['event'] = True
+        y['time'] = value
+
+        with pytest.raises(ValueError, match=match):
+            check_y_survival(y)
+
+    @staticmethod
+    def test_structured_empty():
+        y = numpy.empty(dtype=[('event', bool), ('time', float)], shape=0)
+
+        with pytest.raises(ValueError, match=r"Found array with 0 sample\(s\)"):
+            check_y_survival(y, allow_all_censored=True)
+
+
+class TestBuildSurvivalTreeArray:
+
+    @staticmethod
+    @pytest.mark.parametrize("time_dtype", [float, int])
+    @pytest.mark.parametrize("presorted", [False, True])
+    def test_build_survival_tree_array(time_dtype, presorted):
+        rnd = numpy.random.RandomState(0)
+        time = rnd.randint(1, 30, size=200)
+        if presorted:
+            time.sort()
+        event = rnd.binomial(1, 0.3, size=200).astype(bool)
+        y = numpy.empty(dtype=[('event', bool), ('time', time_dtype), ('entry', time_dtype)], shape=200)
+        y['event'] = event
+        y['time'] = time
+        y['entry'] = time // 2
+        X = rnd.randn(200, 3)
+
+        y_numeric, event_times, actual_event = build_survival_tree_array(X, y, with_event=True)
+
+        assert y_numeric.dtype == numpy.float64
+        assert_array_equal(y_numeric, numpy.column_stack((time, event, time // 2)))
+        assert event_times.dtype == numpy.float64
+        assert_array_equal(event_times, numpy.unique(time[event]))
+        assert_array_equal(actual_event, event)
+
+
+class TestCheckArraySurvival:
+
+    @staticmethod
+    def test_check_array_survival_x_none():
+        y = Surv.from_arrays([True, False, True], [1., 2., 3.])
+
+        event, time = check_array_survival(None, y)
+        assert_array_equal(event, y['event'])
+        assert_array_equal(time, y['time'])
+
+    @staticmethod
+    def test_check_array_survival_x_scalar():
+        y = Surv.from_arrays([True, False, True], [1., 2., 3.])
+
+        x = numpy.array(1.0)
+        # message differs between versions of scikit-learn
+        msg = (r"Singleton array {0} cannot be considered a valid collection\."
+               r"|Input should have at least 1 dimension i\.e\. satisfy `len\(x\.shape\) > 0`, "
+               r"got scalar `{0}` instead\.").format(re.escape(repr(x)))
+        with pytest.raises(TypeError, match=msg):
+            check_array_survival(x, y)
+
+    @staticmethod
+    def test_check_array_survival_x_not_array_like():
+        y = Surv.from_arrays([True, False, True], [1., 2., 3.])
+
+        with pytest.raises(TypeError, match=r"Expected sequence or array-like, got <class 'int'>"):
+            check_array_survival(5, y)